@@ -1,31 +1,94 @@
+import time
+script_start = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import datetime
-import plotly.express as px
-import plotly.graph_objects as go
+from concurrent.futures import ThreadPoolExecutor
 
-from data_generator import generate_ecommerce_data
-from utils import format_currency, apply_filters
+# pandas, plotly.express and the data modules are imported lazily so that
+# the default view can be painted from the startup snapshot without them
+from instrumentation import lazy_import, timed, mark_render
+from utils import format_currency, apply_filters, build_stratified_sample, estimate_kpis, weight_sample
+from snapshot import load_first_view, load_dataset, DEFAULT_CATEGORIES, DEFAULT_REGIONS
 
 # Import all functions from the combined components file
 from components_combined import (
-    create_filters,
-    display_kpi_metrics,
+    get_filter_options,
+    select_filters,
+    display_filter_performance,
+    compute_kpi_metrics,
+    display_kpi_cards,
+    display_approximate_kpi_cards,
     create_sales_trend_chart,
     create_product_performance_chart,
     create_regional_sales_chart,
-    create_category_distribution_chart
+    create_category_distribution_chart,
+    compute_comparison,
+    display_comparison_kpis,
+    create_comparison_trend_chart,
+    display_startup_timings
 )
 
 # Page configuration
-st.set_page_config(
-    page_title="Amazon Seller Analytics Dashboard",
-    page_icon="📊",
-    layout="wide"
-)
+with timed("Streamlit page setup"):
+    st.set_page_config(
+        page_title="Amazon Seller Analytics Dashboard",
+        page_icon="📊",
+        layout="wide"
+    )
+
+@st.cache_resource
+def load_startup_snapshot():
+    """Load the prebuilt first-view aggregates, or None if no snapshot exists."""
+    with timed("Load startup snapshot"):
+        return load_first_view()
+
+@st.cache_resource
+def load_data():
+    """Load the dataset from the startup snapshot, generating it if none was built."""
+    with timed("Load dataset"):
+        df = load_dataset()
+        if df is None:
+            df = lazy_import('data_generator').generate_ecommerce_data()
+    return df
+
+# Derived structures are cached as shared, read-only resources keyed by the
+# id of the cached dataset, so a rerun never hashes, scans or copies the data
 
-# Generate sample data
-df = generate_ecommerce_data()
+@st.cache_resource
+def load_filter_options(_df, dataset_id):
+    """Collect the filter options once per dataset."""
+    return get_filter_options(_df)
+
+@st.cache_resource
+def load_approximate_sample(_df, dataset_id):
+    """Build the stratified sample once per dataset."""
+    return build_stratified_sample(_df)
+
+@st.cache_resource
+def load_top_product_summary(_df, dataset_id):
+    """Build the per-partition top-products summary once per dataset."""
+    return lazy_import('top_products').build_top_product_summary(_df)
+
+def submit_exact_query(df, filters):
+    """
+    Start this session's exact query for the given filters, or reuse it.
+    
+    Each session has its own worker, so abandoned queries never delay other
+    users. A query for stale filters is cancelled if it has not started yet
+    and its result is ignored otherwise.
+    """
+    if 'exact_executor' not in st.session_state:
+        st.session_state.exact_executor = ThreadPoolExecutor(max_workers=1)
+    
+    query = st.session_state.get('exact_query')
+    if query is not None and query[0] == filters:
+        return query[1]
+    if query is not None:
+        query[1].cancel()
+    
+    future = st.session_state.exact_executor.submit(apply_filters, df, *filters)
+    st.session_state.exact_query = (filters, future)
+    return future
 
 # Header
 st.markdown("""
@@ -37,104 +100,240 @@ st.markdown("""
 
 # Sidebar filters
 st.sidebar.title("📌 Dashboard Filters")
-filtered_df, selected_timeframe, selected_category, selected_region = create_filters(df)
+approximate_mode = st.sidebar.toggle(
+    "⚡ Approximate mode",
+    help="Show instant estimates from a stratified sample, then refine to exact figures"
+)
+compare_by = st.sidebar.radio(
+    "🔀 Compare",
+    ["None", "Marketplaces", "Categories"],
+    horizontal=True,
+    help="Show KPIs and trends side by side for each selected marketplace or category"
+)
+
+first_view = load_startup_snapshot()
+df = None if first_view else load_data()
+filter_options = first_view['filter_options'] if first_view else load_filter_options(df, id(df))
+
+start_date, end_date, selected_timeframe, selected_categories, selected_regions = select_filters(filter_options)
+
+# The default view is painted straight from the snapshot; anything else needs the data
+use_snapshot = (
+    first_view is not None and
+    not approximate_mode and
+    start_date.isoformat() == first_view['start_date'] and
+    end_date.isoformat() == first_view['end_date'] and
+    compare_by == "None" and
+    selected_categories == DEFAULT_CATEGORIES and
+    selected_regions == DEFAULT_REGIONS
+)
+if not use_snapshot and df is None:
+    df = load_data()
+
+# In approximate mode the exact query runs in the background; until it has
+# finished the page is painted from the sample and rerun when it is ready
+if approximate_mode:
+    exact_future = submit_exact_query(
+        df, (start_date, end_date, tuple(selected_categories), tuple(selected_regions))
+    )
+show_approximate = approximate_mode and not exact_future.done()
+
+if use_snapshot:
+    kpis = first_view['kpis']
+    display_filter_performance(kpis)
+elif show_approximate:
+    sample_df = load_approximate_sample(df, id(df))
+    filtered_df = apply_filters(sample_df, start_date, end_date, selected_categories, selected_regions)
+    estimates = estimate_kpis(filtered_df)
+    display_filter_performance({name: estimate for name, (estimate, _) in estimates.items()}, approximate=True)
+else:
+    if approximate_mode:
+        filtered_df = exact_future.result()
+    else:
+        filtered_df = apply_filters(df, start_date, end_date, selected_categories, selected_regions)
+    kpis = compute_kpi_metrics(filtered_df)
+    display_filter_performance(kpis)
+
+# The approximate paint groups the sample instead, keeping exact work off its path
+top_products = None
+if use_snapshot:
+    top_products_ranking_exact = first_view['top_products_ranking_exact']
+    top_products_totals_exact = first_view['top_products_totals_exact']
+elif not show_approximate:
+    # Top products come from the merged partition summaries rather than a full groupby
+    product_summary = load_top_product_summary(df, id(df))
+    top_products, top_products_ranking_exact, top_products_totals_exact = lazy_import('top_products').query_top_products(
+        product_summary, df, start_date, end_date, selected_categories, selected_regions
+    )
 
 # Sales Overview
+if selected_categories:
+    category_text = f"in {'category' if len(selected_categories) == 1 else 'categories'} <b>{', '.join(selected_categories)}</b>"
+else:
+    category_text = "across all categories"
+if selected_regions:
+    region_text = f"in {'marketplace' if len(selected_regions) == 1 else 'marketplaces'} <b>{', '.join(selected_regions)}</b>"
+else:
+    region_text = "across all marketplaces"
+
 st.markdown(f"""
 <div style="background-color: rgba(255,153,0,0.05); border-left: 5px solid #FF9900; padding: 15px; border-radius: 5px; margin-bottom: 20px;">
     <h3 style="margin-top: 0;">📊 Amazon Sales Overview</h3>
-    <p>Viewing data for <b>{selected_timeframe}</b> {f'in category <b>{selected_category}</b>' if selected_category != 'All Categories' else 'across all categories'} {f'in marketplace <b>{selected_region}</b>' if selected_region != 'All Marketplaces' else 'across all marketplaces'}</p>
+    <p>Viewing data for <b>{selected_timeframe}</b> {category_text} {region_text}</p>
 </div>
 """, unsafe_allow_html=True)
 
 # KPI metrics
 st.subheader("📈 Key Performance Indicators")
-display_kpi_metrics(filtered_df)
+kpi_slot = st.empty()
 
 # Sales Trend and Product Performance
 col1, col2 = st.columns(2)
 with col1:
     st.subheader("📆 Sales Trend")
-    st.plotly_chart(create_sales_trend_chart(filtered_df, selected_timeframe), use_container_width=True)
+    trend_slot = st.empty()
 with col2:
     st.subheader("💰 Top Revenue by Product")
-    st.plotly_chart(create_product_performance_chart(filtered_df), use_container_width=True)
+    product_slot = st.empty()
 
 # Regional Sales and Category Distribution
 col1, col2 = st.columns(2)
 with col1:
     st.subheader("🌎 Sales by Amazon Marketplace")
-    st.plotly_chart(create_regional_sales_chart(filtered_df), use_container_width=True)
+    region_slot = st.empty()
 with col2:
     st.subheader("📊 Product Category Distribution")
-    st.plotly_chart(create_category_distribution_chart(filtered_df), use_container_width=True)
+    category_slot = st.empty()
 
-# Top selling products table
-col1, col2 = st.columns([9, 1])
-with col1:
-    st.subheader("🔝 Amazon Best Sellers")
-with col2:
-    top_products = filtered_df.groupby('product_name').agg({
-        'quantity': 'sum',
-        'sales': 'sum',
-        'order_id': 'nunique'
-    }).sort_values('sales', ascending=False).reset_index().head(10)
+# The KPI cards are sent before any chart is built, so they are the first paint
+with kpi_slot.container():
+    if show_approximate:
+        display_approximate_kpi_cards(estimates)
+    else:
+        display_kpi_cards(kpis)
+mark_render(script_start, "first paint (KPI cards)")
+
+def render_charts(view_df, approximate=False):
+    """Fill the chart slots, replacing anything shown there before."""
+    chart_df = weight_sample(view_df) if approximate else view_df
+    suffix = "approximate" if approximate else "exact"
+    trend_slot.plotly_chart(create_sales_trend_chart(chart_df, selected_timeframe), use_container_width=True, key=f"trend_{suffix}")
+    product_slot.plotly_chart(create_product_performance_chart(chart_df, top_products), use_container_width=True, key=f"product_{suffix}")
+    region_slot.plotly_chart(create_regional_sales_chart(chart_df), use_container_width=True, key=f"region_{suffix}")
+    category_slot.plotly_chart(create_category_distribution_chart(chart_df), use_container_width=True, key=f"category_{suffix}")
+
+if use_snapshot:
+    figures = first_view['figures']
+    # st.plotly_chart imports plotly.io/plotly.tools and rebuilds and validates
+    # a Figure from each stored spec; that cost stays on this path, so report it
+    lazy_import('plotly.io')
+    lazy_import('plotly.tools')
+    with timed("Render snapshot charts (Plotly validation)"):
+        trend_slot.plotly_chart(figures['trend'], use_container_width=True, key="trend_exact")
+        product_slot.plotly_chart(figures['product'], use_container_width=True, key="product_exact")
+        region_slot.plotly_chart(figures['region'], use_container_width=True, key="region_exact")
+        category_slot.plotly_chart(figures['category'], use_container_width=True, key="category_exact")
+else:
+    render_charts(filtered_df, approximate=show_approximate)
+
+mark_render(script_start, "charts")
+
+if show_approximate:
+    @st.fragment(run_every=0.5)
+    def rerun_when_exact():
+        """Poll this session's exact query and rerun the page once it has finished."""
+        if exact_future.done():
+            st.rerun()
     
-    csv = top_products.to_csv(index=False)
-    st.download_button(
-        label="📥",
-        data=csv,
-        file_name="amazon_best_sellers.csv",
-        mime="text/csv",
-        help="Download data as CSV"
-    )
+    rerun_when_exact()
+    st.info("⏳ Refining exact figures. The comparison and tables appear once they are ready.")
 
-# Display top sellers table
-top_products['sales'] = top_products['sales'].apply(format_currency)
-st.dataframe(
-    top_products.rename(columns={
-        'product_name': 'Product',
-        'quantity': 'Units Sold',
-        'sales': 'Revenue',
-        'order_id': 'Order Count'
-    }),
-    use_container_width=True,
-    hide_index=True
-)
+# The comparison and tables need the exact rows, so they wait for refinement
+if not show_approximate:
+    # Side-by-side comparison, built from one grouped aggregation of the selected rows
+    if compare_by != "None":
+        dimension = 'region' if compare_by == "Marketplaces" else 'category'
+        comparison_df = compute_comparison(filtered_df, dimension, selected_timeframe)
+        
+        st.subheader(f"🔀 {compare_by} Comparison")
+        display_comparison_kpis(comparison_df, dimension)
+        st.plotly_chart(create_comparison_trend_chart(comparison_df, dimension, selected_timeframe), use_container_width=True)
 
-# Recent orders section
-col1, col2 = st.columns([9, 1])
-with col1:
-    st.subheader("🕒 Recent Orders")
-with col2:
-    download_orders = filtered_df.sort_values('date', ascending=False).head(20).copy()
-    download_orders['date'] = download_orders['date'].dt.strftime('%Y-%m-%d')
-    csv = download_orders.to_csv(index=False)
-    st.download_button(
-        label="📥",
-        data=csv,
-        file_name="recent_orders.csv",
-        mime="text/csv",
-        help="Download data as CSV"
+    # The tables below need pandas, so the snapshot rows are only converted now
+    if use_snapshot:
+        pd = lazy_import('pandas')
+        top_products = pd.DataFrame(first_view['top_products'])
+        latest_orders = pd.DataFrame(first_view['recent_orders'])
+        latest_orders['date'] = pd.to_datetime(latest_orders['date'])
+    else:
+        latest_orders = filtered_df.sort_values('date', ascending=False).head(20)
+
+    # Top selling products table
+    col1, col2 = st.columns([9, 1])
+    with col1:
+        st.subheader("🔝 Amazon Best Sellers")
+        if not top_products_ranking_exact:
+            st.caption("Large catalog: totals are lower bounds and the ranking may differ slightly from an exact count.")
+        elif not top_products_totals_exact:
+            st.caption("Large catalog: the ranking is exact, but some totals are lower bounds.")
+    with col2:
+        csv = top_products.to_csv(index=False)
+        st.download_button(
+            label="📥",
+            data=csv,
+            file_name="amazon_best_sellers.csv",
+            mime="text/csv",
+            help="Download data as CSV"
+        )
+
+    # Display top sellers table
+    top_products['sales'] = top_products['sales'].apply(format_currency)
+    st.dataframe(
+        top_products.rename(columns={
+            'product_name': 'Product',
+            'quantity': 'Units Sold',
+            'sales': 'Revenue',
+            'order_id': 'Order Count'
+        }),
+        use_container_width=True,
+        hide_index=True
     )
 
-recent_orders = filtered_df.sort_values('date', ascending=False).head(5)
-recent_orders['sales'] = recent_orders['sales'].apply(format_currency)
-recent_orders['date'] = recent_orders['date'].dt.strftime('%Y-%m-%d')
+    # Recent orders section
+    col1, col2 = st.columns([9, 1])
+    with col1:
+        st.subheader("🕒 Recent Orders")
+    with col2:
+        download_orders = latest_orders.copy()
+        download_orders['date'] = download_orders['date'].dt.strftime('%Y-%m-%d')
+        csv = download_orders.to_csv(index=False)
+        st.download_button(
+            label="📥",
+            data=csv,
+            file_name="recent_orders.csv",
+            mime="text/csv",
+            help="Download data as CSV"
+        )
 
-display_df = recent_orders[[
-    'date', 'order_id', 'product_name', 'quantity', 'sales', 'region'
-]].rename(columns={
-    'date': 'Date',
-    'order_id': 'Order ID',
-    'product_name': 'Product',
-    'quantity': 'Quantity',
-    'sales': 'Revenue',
-    'region': 'Marketplace'
-})
+    recent_orders = latest_orders.head(5).copy()
+    recent_orders['sales'] = recent_orders['sales'].apply(format_currency)
+    recent_orders['date'] = recent_orders['date'].dt.strftime('%Y-%m-%d')
 
-st.dataframe(display_df, use_container_width=True, hide_index=True)
+    display_df = recent_orders[[
+        'date', 'order_id', 'product_name', 'quantity', 'sales', 'region'
+    ]].rename(columns={
+        'date': 'Date',
+        'order_id': 'Order ID',
+        'product_name': 'Product',
+        'quantity': 'Quantity',
+        'sales': 'Revenue',
+        'region': 'Marketplace'
+    })
+
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
 
 # Footer
 st.markdown("---")
 st.caption("Amazon Seller Analytics Dashboard - Based on Amazon Seller Central")
+
+display_startup_timings()
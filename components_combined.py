@@ -4,7 +4,6 @@
 
 import streamlit as st
 import datetime
-import pandas as pd
 from utils import apply_filters
 
 def create_filters(df):
@@ -17,12 +16,84 @@ def create_filters(df):
     Returns:
         filtered_df: DataFrame after applying all filters
         selected_timeframe: The selected time period
-        selected_category: The selected product category
-        selected_region: The selected Amazon marketplace
+        selected_categories: The selected product categories (empty for all)
+        selected_regions: The selected Amazon marketplaces (empty for all)
+    """
+    start_date, end_date, selected_timeframe, selected_categories, selected_regions = select_filters(
+        get_filter_options(df)
+    )
+    
+    # Apply filters
+    filtered_df = apply_filters(df, start_date, end_date, selected_categories, selected_regions)
+    
+    display_filter_performance(compute_kpi_metrics(filtered_df))
+    
+    return filtered_df, selected_timeframe, selected_categories, selected_regions
+
+def get_filter_options(df):
+    """
+    Collect the date bounds and choices offered by the filter controls.
+    
+    Args:
+        df: The original DataFrame containing the Amazon seller data
+        
+    Returns:
+        dict: min_date, max_date, categories and regions
+    """
+    return {
+        'min_date': df['date'].min().date(),
+        'max_date': df['date'].max().date(),
+        'categories': sorted(df['category'].unique().tolist()),
+        'regions': sorted(df['region'].unique().tolist())
+    }
+
+def get_timeframe_dates(timeframe, min_date, max_date):
+    """
+    Resolve a Quick Select time period to its start and end datetimes.
+    
+    Args:
+        timeframe: One of the Quick Select time periods
+        min_date: Earliest order date in the data
+        max_date: Latest order date in the data
+        
+    Returns:
+        tuple: (start_date, end_date)
+    """
+    end_date = datetime.datetime.combine(max_date, datetime.time.max)
+    
+    if timeframe == "Last 7 days":
+        start_date = end_date - datetime.timedelta(days=7)
+    elif timeframe == "Last 30 days":
+        start_date = end_date - datetime.timedelta(days=30)
+    elif timeframe == "Last 90 days":
+        start_date = end_date - datetime.timedelta(days=90)
+    elif timeframe == "Year to date":
+        start_date = datetime.datetime(end_date.year, 1, 1)
+    else:  # All time
+        start_date = datetime.datetime.combine(min_date, datetime.time.min)
+    
+    return start_date, end_date
+
+def select_filters(options):
+    """
+    Display the Amazon Seller filter controls without applying them.
+    
+    Lets callers filter a sample first and the full data later, or skip
+    loading the data entirely when the options come from a snapshot.
+    
+    Args:
+        options: Filter options from get_filter_options
+        
+    Returns:
+        start_date: Start of the selected date range
+        end_date: End of the selected date range
+        selected_timeframe: The selected time period
+        selected_categories: The selected product categories (empty for all)
+        selected_regions: The selected Amazon marketplaces (empty for all)
     """
     # Date range filter
-    min_date = df['date'].min().date()
-    max_date = df['date'].max().date()
+    min_date = options['min_date']
+    max_date = options['max_date']
     
     # Use tabs for different date selection methods
     date_filter_method = st.sidebar.radio(
@@ -48,18 +119,7 @@ def create_filters(df):
             index=1  # Default to Last 30 days
         )
         
-        end_date = datetime.datetime.combine(max_date, datetime.time.max)
-        
-        if selected_timeframe == "Last 7 days":
-            start_date = end_date - datetime.timedelta(days=7)
-        elif selected_timeframe == "Last 30 days":
-            start_date = end_date - datetime.timedelta(days=30)
-        elif selected_timeframe == "Last 90 days":
-            start_date = end_date - datetime.timedelta(days=90)
-        elif selected_timeframe == "Year to date":
-            start_date = datetime.datetime(end_date.year, 1, 1)
-        else:  # All time
-            start_date = datetime.datetime.combine(min_date, datetime.time.min)
+        start_date, end_date = get_timeframe_dates(selected_timeframe, min_date, max_date)
     else:
         # Custom date range with calendar picker
         col1, col2 = st.sidebar.columns(2)
@@ -93,51 +153,94 @@ def create_filters(df):
             selected_timeframe = f"Custom: {start_date.strftime('%b %d')} - {end_date.strftime('%b %d, %Y')}"
     
     # Amazon Product Category filter
-    categories = ["All Categories"] + sorted(df['category'].unique().tolist())
-    selected_category = st.sidebar.selectbox("Amazon Product Category", categories)
+    selected_categories = st.sidebar.multiselect(
+        "Amazon Product Category",
+        options['categories'],
+        placeholder="All Categories"
+    )
     
     # Amazon Marketplace filter (region)
-    regions = ["All Marketplaces"] + sorted(df['region'].unique().tolist())
-    selected_region = st.sidebar.selectbox("Amazon Marketplace", regions)
-    
-    # Apply filters
-    filtered_df = apply_filters(df, start_date, end_date, selected_category, selected_region)
+    selected_regions = st.sidebar.multiselect(
+        "Amazon Marketplace",
+        options['regions'],
+        placeholder="All Marketplaces"
+    )
     
     # Show active filters with Amazon styling
     st.sidebar.markdown("---")
     st.sidebar.markdown("### Active Filters")
     st.sidebar.markdown(f"📅 **Time Period:** {selected_timeframe}")
-    st.sidebar.markdown(f"🏷️ **Product Category:** {selected_category}")
-    st.sidebar.markdown(f"🌎 **Marketplace:** {selected_region}")
+    st.sidebar.markdown(f"🏷️ **Product Category:** {', '.join(selected_categories) or 'All Categories'}")
+    st.sidebar.markdown(f"🌎 **Marketplace:** {', '.join(selected_regions) or 'All Marketplaces'}")
     
-    # Show current Amazon seller metrics after filtering
+    return start_date, end_date, selected_timeframe, selected_categories, selected_regions
+
+def display_filter_performance(metrics, approximate=False):
+    """
+    Show current Amazon seller metrics for the filtered data in the sidebar.
+    
+    Args:
+        metrics: KPI metrics from compute_kpi_metrics for the filtered data
+        approximate: Whether metrics are sample estimates (the estimate part
+            of estimate_kpis), which are shown rounded and marked with ≈
+    """
+    prefix = "≈ " if approximate else ""
     st.sidebar.markdown("---")
     st.sidebar.markdown("### Amazon Performance")
-    st.sidebar.markdown(f"📊 **Total Orders:** {filtered_df['order_id'].nunique():,}")
-    st.sidebar.markdown(f"💰 **Total Revenue:** ${filtered_df['sales'].sum():,.2f}")
-    st.sidebar.markdown(f"📦 **Units Sold:** {filtered_df['quantity'].sum():,}")
-    
-    return filtered_df, selected_timeframe, selected_category, selected_region
+    st.sidebar.markdown(f"📊 **Total Orders:** {prefix}{metrics['total_orders']:,.0f}")
+    st.sidebar.markdown(f"💰 **Total Revenue:** {prefix}${metrics['total_sales']:,.2f}")
+    st.sidebar.markdown(f"📦 **Units Sold:** {prefix}{metrics['total_units_sold']:,.0f}")
 
 
 # ---------- kpi_cards.py ----------
 
 import streamlit as st
-import pandas as pd
-from utils import format_currency
+from utils import format_currency, estimate_kpis
+
+def compute_kpi_metrics(df):
+    """
+    Calculate the exact KPI metrics for the filtered data.
+    
+    Args:
+        df: The filtered DataFrame containing the e-commerce data
+        
+    Returns:
+        dict: total_sales, total_orders, avg_order_value and total_units_sold
+    """
+    total_sales = float(df['sales'].sum())
+    total_orders = int(df['order_id'].nunique())
+    return {
+        'total_sales': total_sales,
+        'total_orders': total_orders,
+        'avg_order_value': total_sales / total_orders if total_orders > 0 else 0,
+        'total_units_sold': int(df['quantity'].sum())
+    }
 
-def display_kpi_metrics(df):
+def display_kpi_metrics(df, approximate=False):
     """
     Display the KPI metrics in a row of cards.
     
     Args:
         df: The filtered DataFrame containing the e-commerce data
+        approximate: Whether df is a filtered stratified sample, in which case
+            the cards show estimates with 95% confidence intervals
+    """
+    if approximate:
+        display_approximate_kpi_metrics(df)
+    else:
+        display_kpi_cards(compute_kpi_metrics(df))
+
+def display_kpi_cards(metrics):
+    """
+    Display precomputed KPI metrics in a row of cards.
+    
+    Args:
+        metrics: KPI metrics from compute_kpi_metrics (or a startup snapshot)
     """
-    # Calculate KPI metrics
-    total_sales = df['sales'].sum()
-    total_orders = df['order_id'].nunique()
-    avg_order_value = total_sales / total_orders if total_orders > 0 else 0
-    total_units_sold = df['quantity'].sum()
+    total_sales = metrics['total_sales']
+    total_orders = metrics['total_orders']
+    avg_order_value = metrics['avg_order_value']
+    total_units_sold = metrics['total_units_sold']
     conversion_rate = 68.5  # This would normally be calculated from actual user session data
     
     # Create a row of metric cards
@@ -178,148 +281,217 @@ def display_kpi_metrics(df):
             delta=f"2.3% vs. prev period"
         )
 
+def display_approximate_kpi_metrics(sample_df):
+    """
+    Display estimated KPI metrics with 95% confidence intervals.
+    
+    Args:
+        sample_df: A filtered sample from build_stratified_sample
+    """
+    display_approximate_kpi_cards(estimate_kpis(sample_df))
+
+def display_approximate_kpi_cards(estimates):
+    """
+    Display precomputed KPI estimates in a row of cards.
+    
+    Args:
+        estimates: KPI estimates and margins from estimate_kpis
+    """
+    total_sales, total_sales_margin = estimates['total_sales']
+    total_orders, total_orders_margin = estimates['total_orders']
+    avg_order_value, avg_order_value_margin = estimates['avg_order_value']
+    total_units_sold, total_units_sold_margin = estimates['total_units_sold']
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    with col1:
+        st.metric(
+            label="Total Revenue",
+            value=f"≈ {format_currency(total_sales)}",
+            delta=f"± {format_currency(total_sales_margin)} (95% CI)",
+            delta_color="off"
+        )
+    
+    with col2:
+        st.metric(
+            label="Orders",
+            value=f"≈ {total_orders:,.0f}",
+            delta=f"± {total_orders_margin:,.0f} (95% CI)",
+            delta_color="off"
+        )
+    
+    with col3:
+        st.metric(
+            label="Avg Order Value",
+            value=f"≈ {format_currency(avg_order_value)}",
+            delta=f"± {format_currency(avg_order_value_margin)} (95% CI)",
+            delta_color="off"
+        )
+    
+    with col4:
+        st.metric(
+            label="Units Sold",
+            value=f"≈ {total_units_sold:,.0f}",
+            delta=f"± {total_units_sold_margin:,.0f} (95% CI)",
+            delta_color="off"
+        )
+    
+    with col5:
+        st.metric(
+            label="Conversion Rate",
+            value="68.5%",
+            delta="Refining exact figures...",
+            delta_color="off"
+        )
+
 
 # ---------- visualizations.py ----------
 
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
+from instrumentation import lazy_import
 
-def create_sales_trend_chart(df, timeframe):
+# Plotly and pandas are imported on first use so a snapshot-only first
+# render never imports pandas or plotly.express. The overview charts are
+# built with graph_objects in a single Figure call: Streamlit has already
+# imported it, and each add_trace or update_layout would revalidate the figure
+
+def get_trend_grouping(timeframe):
     """
-    Create a time series chart showing sales trends over time.
+    Choose the time bucket used by trend charts for a time period.
     
     Args:
-        df: The filtered DataFrame containing the e-commerce data
         timeframe: The selected time period
         
     Returns:
-        fig: A Plotly figure object
+        tuple: (pandas frequency string, x-axis title)
     """
-    # Determine appropriate time grouping based on timeframe
     if timeframe == "Last 7 days":
         # Group by day and hour
-        df_grouped = df.groupby(pd.Grouper(key='date', freq='4h')).agg({
-            'sales': 'sum',
-            'order_id': 'nunique'
-        }).reset_index()
-        x_title = 'Date and Hour'
+        return '4h', 'Date and Hour'
     elif timeframe == "Last 30 days":
         # Group by day
-        df_grouped = df.groupby(pd.Grouper(key='date', freq='D')).agg({
-            'sales': 'sum',
-            'order_id': 'nunique'
-        }).reset_index()
-        x_title = 'Date'
+        return 'D', 'Date'
     else:
         # Group by week
-        df_grouped = df.groupby(pd.Grouper(key='date', freq='W')).agg({
-            'sales': 'sum',
-            'order_id': 'nunique'
-        }).reset_index()
-        x_title = 'Week'
-    
-    # Create figure with dual y-axis
-    fig = go.Figure()
-    
-    # Add sales line
-    fig.add_trace(go.Scatter(
-        x=df_grouped['date'],
-        y=df_grouped['sales'],
-        name='Revenue',
-        line=dict(color='#007bff', width=3),
-        mode='lines+markers'
-    ))
-    
-    # Add orders line on secondary y-axis
-    fig.add_trace(go.Scatter(
-        x=df_grouped['date'],
-        y=df_grouped['order_id'],
-        name='Orders',
-        line=dict(color='#28a745', width=3, dash='dash'),
-        mode='lines+markers',
-        yaxis='y2'
-    ))
-    
-    # Update layout
-    fig.update_layout(
-        xaxis=dict(title=x_title),
-        yaxis=dict(
-            title=dict(text='Revenue ($)', font=dict(color='#007bff')),
-            tickfont=dict(color='#007bff')
-        ),
-        yaxis2=dict(
-            title=dict(text='Number of Orders', font=dict(color='#28a745')),
-            tickfont=dict(color='#28a745'),
-            anchor='x',
-            overlaying='y',
-            side='right'
-        ),
-        hovermode='x unified',
-        legend=dict(
-            orientation='h',
-            yanchor='bottom',
-            y=1.02,
-            xanchor='right',
-            x=1
-        ),
-        margin=dict(l=20, r=20, t=30, b=20),
-        height=400
-    )
-    
-    return fig
+        return 'W', 'Week'
 
-def create_product_performance_chart(df):
+def create_sales_trend_chart(df, timeframe):
     """
-    Create a chart showing top-performing products.
+    Create a time series chart showing sales trends over time.
     
     Args:
         df: The filtered DataFrame containing the e-commerce data
+        timeframe: The selected time period
         
     Returns:
         fig: A Plotly figure object
     """
-    # Group by product and calculate metrics
-    product_performance = df.groupby('product_name').agg({
-        'sales': 'sum',
-        'quantity': 'sum',
-        'order_id': 'nunique'
-    }).reset_index()
+    pd = lazy_import('pandas')
+    go = lazy_import('plotly.graph_objects')
     
-    # Calculate average order value for each product
-    product_performance['avg_price'] = product_performance['sales'] / product_performance['quantity']
+    # Weighted samples count each row as _weight orders
+    order_count = ('_weight', 'sum') if '_weight' in df.columns else ('order_id', 'nunique')
     
-    # Sort by sales and take top 10
-    top_products = product_performance.sort_values('sales', ascending=False).head(10)
+    # Determine appropriate time grouping based on timeframe
+    freq, x_title = get_trend_grouping(timeframe)
+    df_grouped = df.groupby(pd.Grouper(key='date', freq=freq)).agg(
+        sales=('sales', 'sum'),
+        order_id=order_count
+    ).reset_index()
     
-    # Create horizontal bar chart
-    fig = px.bar(
-        top_products,
-        y='product_name',
-        x='sales',
-        orientation='h',
-        color='sales',
-        color_continuous_scale='Blues',
-        # Remove the text labels
+    # Create figure with dual y-axis
+    return go.Figure(
+        data=[
+            # Sales line
+            go.Scatter(
+                x=df_grouped['date'],
+                y=df_grouped['sales'],
+                name='Revenue',
+                line=dict(color='#007bff', width=3),
+                mode='lines+markers'
+            ),
+            # Orders line on secondary y-axis
+            go.Scatter(
+                x=df_grouped['date'],
+                y=df_grouped['order_id'],
+                name='Orders',
+                line=dict(color='#28a745', width=3, dash='dash'),
+                mode='lines+markers',
+                yaxis='y2'
+            )
+        ],
+        layout=go.Layout(
+            xaxis=dict(title=x_title),
+            yaxis=dict(
+                title=dict(text='Revenue ($)', font=dict(color='#007bff')),
+                tickfont=dict(color='#007bff')
+            ),
+            yaxis2=dict(
+                title=dict(text='Number of Orders', font=dict(color='#28a745')),
+                tickfont=dict(color='#28a745'),
+                anchor='x',
+                overlaying='y',
+                side='right'
+            ),
+            hovermode='x unified',
+            legend=dict(
+                orientation='h',
+                yanchor='bottom',
+                y=1.02,
+                xanchor='right',
+                x=1
+            ),
+            margin=dict(l=20, r=20, t=30, b=20),
+            height=400
+        )
     )
+
+def create_product_performance_chart(df, top_products=None):
+    """
+    Create a chart showing top-performing products.
     
-    # Update layout
-    fig.update_layout(
-        xaxis_title='Revenue ($)',
-        yaxis_title=None,
-        yaxis=dict(autorange="reversed"),  # Highest value at the top
-        coloraxis_showscale=False,
-        margin=dict(l=20, r=20, t=30, b=20),
-        height=400,
-        # Remove the title completely
-    )
+    Args:
+        df: The filtered DataFrame containing the e-commerce data
+        top_products: Optional precomputed top products (e.g. from
+            query_top_products), which skips grouping df
+        
+    Returns:
+        fig: A Plotly figure object
+    """
+    go = lazy_import('plotly.graph_objects')
     
-    # Only set hover template, no text display
-    fig.update_traces(
-        hovertemplate='<b>%{y}</b><br>Revenue: $%{x:,.2f}<extra></extra>'
-    )
+    if top_products is None:
+        # Group by product and calculate metrics
+        product_performance = df.groupby('product_name').agg({
+            'sales': 'sum',
+            'quantity': 'sum',
+            'order_id': 'nunique'
+        }).reset_index()
+        
+        # Sort by sales and take top 10
+        top_products = product_performance.sort_values('sales', ascending=False).head(10)
     
-    return fig
+    # Calculate average order value for each product
+    top_products = top_products.assign(avg_price=top_products['sales'] / top_products['quantity'])
+    
+    # Create horizontal bar chart, shaded by revenue
+    return go.Figure(
+        data=[
+            go.Bar(
+                y=top_products['product_name'],
+                x=top_products['sales'],
+                orientation='h',
+                marker=dict(color=top_products['sales'], colorscale='Blues'),
+                # Only set hover template, no text display
+                hovertemplate='<b>%{y}</b><br>Revenue: $%{x:,.2f}<extra></extra>'
+            )
+        ],
+        layout=go.Layout(
+            xaxis_title='Revenue ($)',
+            yaxis=dict(title=None, autorange="reversed"),  # Highest value at the top
+            margin=dict(l=20, r=20, t=30, b=20),
+            height=400
+        )
+    )
 
 def create_regional_sales_chart(df):
     """
@@ -331,6 +503,9 @@ def create_regional_sales_chart(df):
     Returns:
         fig: A Plotly figure object
     """
+    go = lazy_import('plotly.graph_objects')
+    colors = lazy_import('plotly.colors')
+    
     # Group by region
     region_sales = df.groupby('region').agg({
         'sales': 'sum',
@@ -344,36 +519,31 @@ def create_regional_sales_chart(df):
     total_sales = region_sales['sales'].sum()
     region_sales['percentage'] = region_sales['sales'] / total_sales * 100
     
-    # Create a pie chart
-    fig = px.pie(
-        region_sales,
-        values='sales',
-        names='region',
-        color_discrete_sequence=px.colors.qualitative.Set3,
-        hover_data=['percentage']
-    )
-    
-    # Update traces for better hover info
-    fig.update_traces(
-        textposition='inside',
-        textinfo='percent+label',
-        hovertemplate='<b>%{label}</b><br>Revenue: $%{value:,.2f}<br>Percentage: %{customdata[0]:.1f}%<extra></extra>'
-    )
-    
-    # Update layout
-    fig.update_layout(
-        margin=dict(l=20, r=20, t=30, b=20),
-        height=400,
-        legend=dict(
-            orientation='h',
-            yanchor='bottom',
-            y=-0.2,
-            xanchor='center',
-            x=0.5
+    # Create a pie chart with hover info for each marketplace
+    return go.Figure(
+        data=[
+            go.Pie(
+                values=region_sales['sales'],
+                labels=region_sales['region'],
+                customdata=region_sales[['percentage']],
+                marker=dict(colors=colors.qualitative.Set3),
+                textposition='inside',
+                textinfo='percent+label',
+                hovertemplate='<b>%{label}</b><br>Revenue: $%{value:,.2f}<br>Percentage: %{customdata[0]:.1f}%<extra></extra>'
+            )
+        ],
+        layout=go.Layout(
+            margin=dict(l=20, r=20, t=30, b=20),
+            height=400,
+            legend=dict(
+                orientation='h',
+                yanchor='bottom',
+                y=-0.2,
+                xanchor='center',
+                x=0.5
+            )
         )
     )
-    
-    return fig
 
 def create_category_distribution_chart(df):
     """
@@ -385,6 +555,8 @@ def create_category_distribution_chart(df):
     Returns:
         fig: A Plotly figure object
     """
+    go = lazy_import('plotly.graph_objects')
+    
     # Group by category
     category_sales = df.groupby('category').agg({
         'sales': 'sum',
@@ -399,54 +571,187 @@ def create_category_distribution_chart(df):
     category_sales = category_sales.sort_values('sales', ascending=True)
     
     # Create horizontal bar chart
-    fig = go.Figure()
-    
-    # Add bars for sales
-    fig.add_trace(go.Bar(
-        y=category_sales['category'],
-        x=category_sales['sales'],
-        name='Revenue',
-        orientation='h',
-        marker_color='#4e73df',
-        # Remove text values
-        hovertemplate='<b>%{y}</b><br>Revenue: $%{x:,.2f}<extra></extra>'
-    ))
-    
-    # Add markers for average price
-    fig.add_trace(go.Scatter(
-        y=category_sales['category'],
-        x=category_sales['avg_price'] * 50,  # Scale for visibility
-        name='Avg Price per Item',
-        mode='markers',
-        marker=dict(
-            size=12,
-            symbol='circle',
-            color='#f6c23e',
-            line=dict(width=2, color='#e0aa0b')
-        ),
-        hovertemplate='<b>%{y}</b><br>Avg Price: $%{text:.2f}<extra></extra>',
-        text=category_sales['avg_price']
-    ))
-    
-    # Update layout
+    return go.Figure(
+        data=[
+            # Bars for sales
+            go.Bar(
+                y=category_sales['category'],
+                x=category_sales['sales'],
+                name='Revenue',
+                orientation='h',
+                marker_color='#4e73df',
+                # Remove text values
+                hovertemplate='<b>%{y}</b><br>Revenue: $%{x:,.2f}<extra></extra>'
+            ),
+            # Markers for average price
+            go.Scatter(
+                y=category_sales['category'],
+                x=category_sales['avg_price'] * 50,  # Scale for visibility
+                name='Avg Price per Item',
+                mode='markers',
+                marker=dict(
+                    size=12,
+                    symbol='circle',
+                    color='#f6c23e',
+                    line=dict(width=2, color='#e0aa0b')
+                ),
+                hovertemplate='<b>%{y}</b><br>Avg Price: $%{text:.2f}<extra></extra>',
+                text=category_sales['avg_price']
+            )
+        ],
+        layout=go.Layout(
+            xaxis_title='Revenue ($)',
+            yaxis_title=None,
+            legend=dict(
+                orientation='h',
+                yanchor='bottom',
+                y=1.02,
+                xanchor='right',
+                x=1
+            ),
+            margin=dict(l=20, r=20, t=30, b=20),
+            height=400,
+            xaxis2=dict(
+                overlaying='x',
+                side='top',
+                range=[0, category_sales['avg_price'].max() * 100],
+                showticklabels=False
+            )
+        )
+    )
+
+
+# ---------- comparison.py ----------
+
+import streamlit as st
+from instrumentation import lazy_import
+from utils import format_currency
+
+def compute_comparison(df, dimension, timeframe):
+    """
+    Aggregate the filtered data per comparison group and time bucket in one pass.
+    
+    Both the KPI rows and the small-multiple trend charts are derived from
+    this single grouped result, so comparing every marketplace costs about
+    the same as the regular trend chart.
+    
+    Args:
+        df: The filtered DataFrame containing the e-commerce data
+        dimension: Column to compare, 'region' or 'category'
+        timeframe: The selected time period
+        
+    Returns:
+        DataFrame: sales, quantity and order_id per group and time bucket,
+        with groups ordered by revenue and every group covering the same buckets
+    """
+    pd = lazy_import('pandas')
+    
+    freq, _ = get_trend_grouping(timeframe)
+    grouped = df.groupby([dimension, pd.Grouper(key='date', freq=freq)], observed=True).agg(
+        sales=('sales', 'sum'),
+        quantity=('quantity', 'sum'),
+        order_id=('order_id', 'nunique')
+    )
+    if grouped.empty:
+        return grouped.reset_index()
+    
+    # Fill buckets without orders with zeros, like the main trend chart, so
+    # low-volume groups don't draw lines across empty periods
+    dates = grouped.index.get_level_values('date')
+    buckets = pd.date_range(dates.min(), dates.max(), freq=freq)
+    groups = grouped['sales'].groupby(level=dimension).sum().sort_values(ascending=False).index
+    full_index = pd.MultiIndex.from_product([groups, buckets], names=[dimension, 'date'])
+    
+    return grouped.reindex(full_index, fill_value=0).reset_index()
+
+def display_comparison_kpis(comparison_df, dimension):
+    """
+    Display a row of KPI cards for each comparison group.
+    
+    Args:
+        comparison_df: Grouped data from compute_comparison
+        dimension: Column being compared, 'region' or 'category'
+    """
+    # Each order falls in one time bucket, so bucket order counts add up;
+    # groups keep the revenue order of compute_comparison, like the charts
+    totals = comparison_df.groupby(dimension, sort=False)[['sales', 'quantity', 'order_id']].sum()
+    
+    for group, row in totals.iterrows():
+        col0, col1, col2, col3, col4 = st.columns([2, 1, 1, 1, 1])
+        
+        with col0:
+            st.markdown(f"**{group}**")
+        with col1:
+            st.metric(label="Total Revenue", value=format_currency(row['sales']))
+        with col2:
+            st.metric(label="Orders", value=f"{int(row['order_id']):,}")
+        with col3:
+            avg_order_value = row['sales'] / row['order_id'] if row['order_id'] > 0 else 0
+            st.metric(label="Avg Order Value", value=format_currency(avg_order_value))
+        with col4:
+            st.metric(label="Units Sold", value=f"{int(row['quantity']):,}")
+
+def create_comparison_trend_chart(comparison_df, dimension, timeframe):
+    """
+    Create small-multiple revenue trend charts, one panel per comparison group.
+    
+    Args:
+        comparison_df: Grouped data from compute_comparison
+        dimension: Column being compared, 'region' or 'category'
+        timeframe: The selected time period
+        
+    Returns:
+        fig: A Plotly figure object
+    """
+    px = lazy_import('plotly.express')
+    
+    _, x_title = get_trend_grouping(timeframe)
+    num_rows = -(-comparison_df[dimension].nunique() // 3)
+    
+    fig = px.line(
+        comparison_df,
+        x='date',
+        y='sales',
+        facet_col=dimension,
+        facet_col_wrap=3,
+        category_orders={dimension: comparison_df[dimension].unique().tolist()},
+        markers=True,
+        custom_data=['order_id'],
+        color_discrete_sequence=['#007bff']
+    )
+    
+    # Show just the group name above each panel
+    fig.for_each_annotation(lambda annotation: annotation.update(text=annotation.text.split('=')[-1]))
+    
+    fig.update_xaxes(title=None)
+    fig.update_yaxes(title=None)
     fig.update_layout(
-        xaxis_title='Revenue ($)',
-        yaxis_title=None,
-        legend=dict(
-            orientation='h',
-            yanchor='bottom',
-            y=1.02,
-            xanchor='right',
-            x=1
-        ),
         margin=dict(l=20, r=20, t=30, b=20),
-        height=400,
-        xaxis2=dict(
-            overlaying='x',
-            side='top',
-            range=[0, category_sales['avg_price'].max() * 100],
-            showticklabels=False
-        )
+        height=max(num_rows, 1) * 250
+    )
+    
+    fig.update_traces(
+        hovertemplate=f'{x_title}: %{{x}}<br>Revenue: $%{{y:,.2f}}<br>Orders: %{{customdata[0]}}<extra></extra>'
     )
     
     return fig
+
+
+# ---------- timings.py ----------
+
+import streamlit as st
+from instrumentation import import_times, startup_times
+
+def display_startup_timings():
+    """
+    Show import and startup timings in a collapsed sidebar section.
+    """
+    with st.sidebar.expander("⏱️ Startup Timings (this server process)"):
+        st.caption(
+            "Per-process numbers shared by all sessions. Imports are timed on first use; "
+            "steps show the latest run. Streamlit's own import at server start is not included."
+        )
+        for label, seconds in startup_times.items():
+            st.caption(f"{label}: {seconds * 1000:,.0f} ms")
+        for module_name, seconds in import_times.items():
+            st.caption(f"import {module_name}: {seconds * 1000:,.0f} ms")
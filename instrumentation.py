@@ -0,0 +1,62 @@
+import sys
+import time
+import importlib
+from contextlib import contextmanager
+
+# Timings are module globals, so they are per server process and shared by
+# every session. Import times come from the run that first needed each
+# module; step timings are overwritten by the latest run that executed them.
+
+# Seconds spent importing each lazily imported module
+import_times = {}
+
+# Seconds spent in each timed startup step, plus time to each render stage
+startup_times = {}
+
+def lazy_import(module_name):
+    """
+    Import a module the first time it is needed and record how long it took.
+
+    Args:
+        module_name: Dotted name of the module, e.g. 'plotly.express'
+
+    Returns:
+        module: The imported module
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    import_times[module_name] = time.perf_counter() - start
+    return module
+
+@contextmanager
+def timed(label):
+    """
+    Record the time spent in a block under the given label.
+
+    Args:
+        label: Name shown in the startup timings
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_times[label] = time.perf_counter() - start
+
+def mark_render(script_start, stage):
+    """
+    Record the time from script start to a render stage for this run and,
+    once per process, for the first (cold) run.
+
+    The clock starts when the script run begins, so Streamlit's own import
+    at server start is not included.
+
+    Args:
+        script_start: time.perf_counter() value taken when the script run began
+        stage: Name of what has been rendered, e.g. 'first paint (KPI cards)'
+    """
+    elapsed = time.perf_counter() - script_start
+    startup_times[f"Latest run: time to {stage}"] = elapsed
+    startup_times.setdefault(f"First run in this process: time to {stage}", elapsed)
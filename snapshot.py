@@ -0,0 +1,123 @@
+import os
+import json
+import datetime
+from instrumentation import lazy_import
+
+# Prebuilt startup snapshot, written by running `python snapshot.py`
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshot')
+DATASET_PATH = os.path.join(SNAPSHOT_DIR, 'dataset.pkl')
+FIRST_VIEW_PATH = os.path.join(SNAPSHOT_DIR, 'first_view.json')
+
+# Filters shown on first load (the defaults of select_filters)
+DEFAULT_TIMEFRAME = "Last 30 days"
+DEFAULT_CATEGORIES = []
+DEFAULT_REGIONS = []
+
+def _records(df):
+    """Convert a DataFrame to JSON-safe row dicts with ISO dates."""
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+def build_startup_snapshot(df=None, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Write the dataset and its first-view aggregates to disk.
+
+    The first view is stored as plain JSON (filter options, KPI metrics,
+    Plotly figure specs and table rows) so the dashboard can paint it
+    without importing pandas or running the chart builders. st.plotly_chart
+    still validates each stored figure spec when it is drawn.
+
+    Args:
+        df: The Amazon seller data; generated when not given
+        snapshot_dir: Directory to write the snapshot files into
+
+    Returns:
+        dict: The first-view aggregates that were written
+    """
+    # Imported here since the app imports this module on its fast path
+    from data_generator import generate_ecommerce_data
+    from utils import apply_filters
+    from top_products import build_top_product_summary, query_top_products
+    from components_combined import (
+        get_filter_options,
+        get_timeframe_dates,
+        compute_kpi_metrics,
+        create_sales_trend_chart,
+        create_product_performance_chart,
+        create_regional_sales_chart,
+        create_category_distribution_chart
+    )
+
+    if df is None:
+        df = generate_ecommerce_data()
+
+    options = get_filter_options(df)
+    start_date, end_date = get_timeframe_dates(DEFAULT_TIMEFRAME, options['min_date'], options['max_date'])
+    filtered_df = apply_filters(df, start_date, end_date, DEFAULT_CATEGORIES, DEFAULT_REGIONS)
+    top_products, top_products_ranking_exact, top_products_totals_exact = query_top_products(
+        build_top_product_summary(df), df, start_date, end_date, DEFAULT_CATEGORIES, DEFAULT_REGIONS
+    )
+
+    first_view = {
+        'filter_options': {
+            'min_date': options['min_date'].isoformat(),
+            'max_date': options['max_date'].isoformat(),
+            'categories': options['categories'],
+            'regions': options['regions']
+        },
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'kpis': compute_kpi_metrics(filtered_df),
+        'figures': {
+            'trend': json.loads(create_sales_trend_chart(filtered_df, DEFAULT_TIMEFRAME).to_json()),
+            'product': json.loads(create_product_performance_chart(filtered_df, top_products).to_json()),
+            'region': json.loads(create_regional_sales_chart(filtered_df).to_json()),
+            'category': json.loads(create_category_distribution_chart(filtered_df).to_json())
+        },
+        'top_products': _records(top_products),
+        'top_products_ranking_exact': top_products_ranking_exact,
+        'top_products_totals_exact': top_products_totals_exact,
+        'recent_orders': _records(filtered_df.sort_values('date', ascending=False).head(20))
+    }
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    df.to_pickle(os.path.join(snapshot_dir, os.path.basename(DATASET_PATH)))
+    with open(os.path.join(snapshot_dir, os.path.basename(FIRST_VIEW_PATH)), 'w') as f:
+        json.dump(first_view, f)
+
+    return first_view
+
+def load_first_view():
+    """
+    Load the first-view aggregates from the startup snapshot.
+
+    Returns:
+        dict: First-view aggregates with filter option dates parsed, or None
+        if no snapshot has been built
+    """
+    if not os.path.exists(FIRST_VIEW_PATH):
+        return None
+
+    with open(FIRST_VIEW_PATH) as f:
+        first_view = json.load(f)
+
+    options = first_view['filter_options']
+    options['min_date'] = datetime.date.fromisoformat(options['min_date'])
+    options['max_date'] = datetime.date.fromisoformat(options['max_date'])
+    return first_view
+
+def load_dataset():
+    """
+    Load the full dataset from the startup snapshot.
+
+    Returns:
+        DataFrame: The Amazon seller data, or None if no snapshot has been built
+    """
+    if not os.path.exists(DATASET_PATH):
+        return None
+
+    pd = lazy_import('pandas')
+    return pd.read_pickle(DATASET_PATH)
+
+if __name__ == "__main__":
+    build_startup_snapshot()
+    print(f"Startup snapshot written to {SNAPSHOT_DIR}")
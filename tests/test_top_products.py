@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generator import generate_ecommerce_data
+from utils import apply_filters
+from top_products import build_top_product_summary, merge_summaries, query_top_products
+
+@pytest.fixture(scope='module')
+def large_catalog_df():
+    """Generated orders spread over a few thousand skewed product names."""
+    df = generate_ecommerce_data(5000)
+    rng = np.random.default_rng(0)
+    suffix = pd.Series(rng.zipf(1.5, len(df)) % 2000, index=df.index).astype(str)
+    return df.assign(product_name=df['product_name'] + ' #' + suffix)
+
+@pytest.fixture(scope='module')
+def dense_catalog_df():
+    """Generated best sellers among a long tail of cheap products, so partitions overflow."""
+    df = generate_ecommerce_data(20000)
+    rng = np.random.default_rng(0)
+    tail = pd.Series(rng.random(len(df)) < 0.7, index=df.index)
+    suffix = pd.Series(rng.integers(0, 5000, len(df)), index=df.index).astype(str)
+    # Start on a day boundary so the partitions don't depend on when the tests run
+    offset = df['date'].min() - df['date'].min().normalize()
+    return df.assign(
+        date=df['date'] - offset,
+        product_name=df['product_name'].where(~tail, df['product_name'] + ' #' + suffix),
+        sales=df['sales'].where(~tail, df['sales'] * 0.05)
+    )
+
+def full_groupby(df, start_date, end_date, category, region, k=10, by='sales'):
+    """Top products computed the slow way, for comparison."""
+    filtered_df = apply_filters(df, start_date, end_date, category, region)
+    return filtered_df.groupby('product_name').agg(
+        quantity=('quantity', 'sum'),
+        sales=('sales', 'sum'),
+        order_id=('order_id', 'nunique')
+    ).sort_values(by, ascending=False, kind='stable').head(k).reset_index()
+
+def query_cases(df):
+    """Filter combinations, including ranges that start and end mid-day."""
+    last_day = df['date'].max().normalize()
+    return [
+        (df['date'].min(), df['date'].max(), [], []),
+        (last_day - pd.Timedelta(days=30, hours=-12), last_day + pd.Timedelta(hours=15, minutes=30), [], []),
+        (last_day - pd.Timedelta(days=7), last_day + pd.Timedelta(hours=23), ['Books', 'Sports'], []),
+        (last_day - pd.Timedelta(days=60, hours=-6), last_day - pd.Timedelta(days=2, hours=3), [], ['Amazon.com (US)']),
+        (last_day + pd.Timedelta(hours=2), last_day + pd.Timedelta(hours=9), [], [])
+    ]
+
+def assert_sound(df, case, top_products, ranking_exact, totals_exact, by):
+    """Check that the exactness flags never claim more than holds."""
+    expected = full_groupby(df, *case, by=by)
+    if ranking_exact:
+        assert top_products['product_name'].tolist() == expected['product_name'].tolist()
+    if ranking_exact and totals_exact:
+        assert_matches(top_products, expected, by)
+    
+    # Reported totals are always lower bounds of the true totals
+    true_totals = apply_filters(df, *case).groupby('product_name')[by].sum()
+    reported = top_products.set_index('product_name')[by]
+    assert (reported <= true_totals[reported.index] + 1e-6).all()
+    if totals_exact:
+        assert np.allclose(reported, true_totals[reported.index])
+
+def assert_matches(top_products, expected, by):
+    assert top_products['product_name'].tolist() == expected['product_name'].tolist()
+    assert np.allclose(top_products[by], expected[by])
+    assert top_products['order_id'].tolist() == expected['order_id'].tolist()
+
+@pytest.mark.parametrize('by', ['sales', 'quantity'])
+@pytest.mark.parametrize('capacity', [1, 3, 10, 50])
+def test_exact_flag_is_never_wrong(large_catalog_df, capacity, by):
+    summary = build_top_product_summary(large_catalog_df, capacity=capacity)
+    for case in query_cases(large_catalog_df):
+        top_products, ranking_exact, totals_exact = query_top_products(summary, large_catalog_df, *case, by=by)
+        assert_sound(large_catalog_df, case, top_products, ranking_exact, totals_exact, by)
+
+@pytest.mark.parametrize('by', ['sales', 'quantity'])
+@pytest.mark.parametrize('capacity', [3, 10, 25])
+def test_exact_flags_are_sound_when_partitions_overflow(dense_catalog_df, capacity, by):
+    summary = build_top_product_summary(dense_catalog_df, capacity=capacity)
+    assert (summary['partitions'][f'{by}_threshold'] > 0).any()
+    for case in query_cases(dense_catalog_df):
+        top_products, ranking_exact, totals_exact = query_top_products(summary, dense_catalog_df, *case, by=by)
+        assert_sound(dense_catalog_df, case, top_products, ranking_exact, totals_exact, by)
+
+def test_ranking_settles_despite_dropped_products(dense_catalog_df):
+    summary = build_top_product_summary(dense_catalog_df, capacity=10)
+    for case in query_cases(dense_catalog_df)[2:4]:
+        top_products, ranking_exact, totals_exact = query_top_products(summary, dense_catalog_df, *case)
+        # Some best sellers were dropped by a partition, yet none can be overtaken
+        assert ranking_exact and not totals_exact
+        assert top_products['product_name'].tolist() == full_groupby(dense_catalog_df, *case)['product_name'].tolist()
+
+def test_small_capacity_reports_inexact(large_catalog_df):
+    summary = build_top_product_summary(large_catalog_df, capacity=1)
+    _, ranking_exact, totals_exact = query_top_products(summary, large_catalog_df, *query_cases(large_catalog_df)[0])
+    assert not (ranking_exact and totals_exact)
+
+def test_large_capacity_is_exact_with_partial_days(large_catalog_df):
+    summary = build_top_product_summary(large_catalog_df, capacity=10_000)
+    for case in query_cases(large_catalog_df):
+        top_products, ranking_exact, totals_exact = query_top_products(summary, large_catalog_df, *case)
+        assert ranking_exact and totals_exact
+        assert_matches(top_products, full_groupby(large_catalog_df, *case), 'sales')
+
+def test_merged_summaries_match_single_summary(large_catalog_df):
+    split = large_catalog_df['date'].min().normalize() + pd.Timedelta(days=45)
+    early = large_catalog_df[large_catalog_df['date'] < split]
+    late = large_catalog_df[large_catalog_df['date'] >= split]
+    
+    merged = merge_summaries(
+        build_top_product_summary(early, capacity=3),
+        build_top_product_summary(late, capacity=3)
+    )
+    single = build_top_product_summary(large_catalog_df, capacity=3)
+    
+    for case in query_cases(large_catalog_df):
+        merged_top, *merged_exact = query_top_products(merged, large_catalog_df, *case)
+        single_top, *single_exact = query_top_products(single, large_catalog_df, *case)
+        assert merged_exact == single_exact
+        pd.testing.assert_frame_equal(merged_top, single_top)
@@ -0,0 +1,61 @@
+import datetime
+
+import pytest
+
+from data_generator import generate_ecommerce_data
+from utils import apply_filters, build_stratified_sample, estimate_kpis, weight_sample
+
+def exact_kpis(df):
+    """Exact KPI values, counting each row as one order like estimate_kpis."""
+    return {
+        'total_sales': df['sales'].sum(),
+        'total_orders': len(df),
+        'avg_order_value': df['sales'].sum() / len(df),
+        'total_units_sold': df['quantity'].sum()
+    }
+
+def test_estimate_is_exact_when_sample_is_whole_population():
+    df = generate_ecommerce_data(2000)
+    sample = build_stratified_sample(df, sample_size=len(df))
+    assert len(sample) == len(df)
+    
+    estimates = estimate_kpis(sample)
+    for name, value in exact_kpis(df).items():
+        estimate, margin = estimates[name]
+        assert estimate == pytest.approx(value)
+        assert margin == pytest.approx(0, abs=1e-6)
+
+def test_intervals_cover_exact_values_on_filtered_subset():
+    df = generate_ecommerce_data(20000)
+    sample = build_stratified_sample(df, sample_size=2000)
+    assert len(sample) < len(df)
+    
+    end_date = df['date'].max()
+    start_date = end_date - datetime.timedelta(days=30)
+    filters = (start_date, end_date, ['Electronics', 'Books'], [])
+    
+    # A wide interval keeps the test stable as generated dates move with the clock
+    estimates = estimate_kpis(apply_filters(sample, *filters), z=3)
+    for name, value in exact_kpis(apply_filters(df, *filters)).items():
+        estimate, margin = estimates[name]
+        assert margin > 0
+        assert abs(estimate - value) <= margin, name
+
+def test_weighted_sample_sums_match_estimates():
+    df = generate_ecommerce_data(5000)
+    sample = build_stratified_sample(df, sample_size=500)
+    
+    estimates = estimate_kpis(sample)
+    weighted = weight_sample(sample)
+    assert weighted['sales'].sum() == pytest.approx(estimates['total_sales'][0])
+    assert weighted['quantity'].sum() == pytest.approx(estimates['total_units_sold'][0])
+    assert weighted['_weight'].sum() == pytest.approx(len(df))
+
+def test_estimate_of_empty_subset_is_zero():
+    df = generate_ecommerce_data(2000)
+    sample = build_stratified_sample(df, sample_size=500)
+    
+    estimates = estimate_kpis(sample[sample['sales'] < 0])
+    for name, (estimate, margin) in estimates.items():
+        assert estimate == 0, name
+        assert margin == 0, name
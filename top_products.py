@@ -0,0 +1,245 @@
+import pandas as pd
+import numpy as np
+from utils import normalize_selection
+
+# Columns identifying one summary partition (a day of one category in one marketplace)
+PARTITION_COLUMNS = ['day', 'category', 'region']
+
+def build_top_product_summary(df, capacity=25):
+    """
+    Build a bounded top-products summary for every day/category/marketplace partition.
+
+    Each partition keeps its top `capacity` products by revenue and by units,
+    plus thresholds bounding the revenue and units of any product it dropped.
+    Queries then merge partition summaries instead of grouping every order.
+
+    Args:
+        df: The original DataFrame containing Amazon seller data
+        capacity: Number of products kept per partition for each metric
+
+    Returns:
+        dict: 'products' DataFrame of kept products per partition and
+        'partitions' DataFrame of partition keys, thresholds and product rows
+    """
+    per_product = df.groupby(
+        [df['date'].dt.floor('D').rename('day'), 'category', 'region', 'product_name'],
+        observed=True
+    ).agg(
+        sales=('sales', 'sum'),
+        quantity=('quantity', 'sum'),
+        order_id=('order_id', 'nunique')
+    ).reset_index()
+
+    grouped = per_product.groupby(PARTITION_COLUMNS, observed=True, sort=False)
+    per_product['partition'] = grouped.ngroup()
+    keep = (
+        (grouped['sales'].rank(method='first', ascending=False) <= capacity) |
+        (grouped['quantity'].rank(method='first', ascending=False) <= capacity)
+    )
+
+    # A dropped product can have at most the largest value among dropped products
+    partitions = per_product.groupby('partition')[PARTITION_COLUMNS].first()
+    thresholds = per_product[~keep].groupby('partition')[['sales', 'quantity']].max()
+    partitions = partitions.join(thresholds).fillna({'sales': 0, 'quantity': 0}).rename(
+        columns={'sales': 'sales_threshold', 'quantity': 'quantity_threshold'}
+    ).reset_index()
+
+    products = per_product.loc[keep, ['partition', 'product_name', 'sales', 'quantity', 'order_id']]
+    return _index_summary(products, partitions)
+
+def _index_summary(products, partitions):
+    """
+    Order a summary so queries only touch the partitions they select.
+
+    Partitions are sorted by day, and each one records the [start, stop)
+    rows of its kept products, which are stored contiguously.
+
+    Args:
+        products: Kept products with a partition column
+        partitions: Partition keys and thresholds with a partition column
+
+    Returns:
+        dict: The indexed summary
+    """
+    products = products.sort_values('partition', kind='stable').reset_index(drop=True)
+    product_partitions = products['partition'].to_numpy()
+    partition_ids = partitions['partition'].to_numpy()
+
+    partitions = partitions.assign(
+        start=np.searchsorted(product_partitions, partition_ids, side='left'),
+        stop=np.searchsorted(product_partitions, partition_ids, side='right')
+    ).sort_values('day', kind='stable').reset_index(drop=True)
+
+    return {'products': products, 'partitions': partitions}
+
+def merge_summaries(*summaries):
+    """
+    Combine summaries built over disjoint data, e.g. consecutive time buckets.
+
+    Args:
+        *summaries: Summaries returned by build_top_product_summary
+
+    Returns:
+        dict: A single summary covering all the input data
+    """
+    products, partitions = [], []
+    offset = 0
+    for summary in summaries:
+        products.append(summary['products'].assign(partition=summary['products']['partition'] + offset))
+        partitions.append(summary['partitions'].assign(partition=summary['partitions']['partition'] + offset))
+        offset += len(summary['partitions'])
+
+    return _index_summary(pd.concat(products, ignore_index=True), pd.concat(partitions, ignore_index=True))
+
+def _exact_rows(df, start_date, end_date, category, region):
+    """
+    Group the orders in a date range that no whole-day partition covers.
+
+    Args:
+        df: The original DataFrame, sorted by date
+        start_date: Start of the range (inclusive)
+        end_date: End of the range (inclusive)
+        category: Selected Amazon product category, or a list of categories
+        region: Selected Amazon marketplace, or a list of marketplaces
+
+    Returns:
+        DataFrame: Exact per-product totals for the range, with each product's category
+    """
+    dates = df['date'].to_numpy()
+    lo = np.searchsorted(dates, np.datetime64(start_date), side='left')
+    hi = np.searchsorted(dates, np.datetime64(end_date), side='right')
+    rows = df.iloc[lo:hi]
+
+    categories = normalize_selection(category, ["All Categories"])
+    if categories is not None:
+        rows = rows[rows['category'].isin(categories)]
+    regions = normalize_selection(region, ["All Marketplaces", "All Regions"])
+    if regions is not None:
+        rows = rows[rows['region'].isin(regions)]
+
+    return rows.groupby(['product_name', 'category'], observed=True).agg(
+        sales=('sales', 'sum'),
+        quantity=('quantity', 'sum'),
+        order_id=('order_id', 'nunique')
+    ).reset_index()
+
+def _max_below(values, tail):
+    """
+    Largest value strictly after each position, including a trailing value.
+
+    Args:
+        values: Values in ranked order
+        tail: Value that ranks after all of them
+
+    Returns:
+        ndarray: For each position, the maximum of the later values and tail
+    """
+    suffix = np.maximum.accumulate(np.append(values, tail)[::-1])[::-1]
+    return suffix[1:]
+
+def query_top_products(summary, df, start_date, end_date, category, region, k=10, by='sales'):
+    """
+    Find the top-k products for the current filters from a summary.
+
+    Whole days are answered from the summary; partial days at either end of
+    the range are grouped exactly from df. A product's total is a lower bound
+    whenever some partition of its category dropped it, so the ranking and
+    the totals are checked for exactness separately.
+
+    Args:
+        summary: Summary returned by build_top_product_summary
+        df: The original DataFrame, sorted by date (as generated)
+        start_date: Start date for filtering sales data
+        end_date: End date for filtering sales data
+        category: Selected Amazon product category, or a list of categories
+        region: Selected Amazon marketplace, or a list of marketplaces
+        k: Number of products to return
+        by: Metric to rank by, 'sales' or 'quantity'
+
+    Returns:
+        top_products: DataFrame with product_name, quantity, sales and order_id
+        ranking_exact: Whether the products and their order match a full groupby
+        totals_exact: Whether the reported totals match a full groupby
+    """
+    start_date = pd.Timestamp(start_date)
+    end_date = pd.Timestamp(end_date)
+    partitions = summary['partitions']
+    threshold_column = f'{by}_threshold'
+
+    # Whole days inside the range come from the summary; partitions are
+    # sorted by day, so the range is a contiguous slice
+    first_day = start_date.ceil('D')
+    end_day = (end_date + pd.Timedelta(microseconds=1)).floor('D')
+    selected = partitions.iloc[
+        partitions['day'].searchsorted(first_day):partitions['day'].searchsorted(end_day)
+    ]
+    categories = normalize_selection(category, ["All Categories"])
+    if categories is not None:
+        selected = selected[selected['category'].isin(categories)]
+    regions = normalize_selection(region, ["All Marketplaces", "All Regions"])
+    if regions is not None:
+        selected = selected[selected['region'].isin(regions)]
+
+    # Gather only the product rows of the selected partitions
+    lengths = (selected['stop'] - selected['start']).to_numpy()
+    rows = np.repeat(selected['start'].to_numpy() - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    kept = summary['products'].iloc[rows].assign(
+        category=np.repeat(selected['category'].to_numpy(), lengths),
+        **{threshold_column: np.repeat(selected[threshold_column].to_numpy(), lengths)}
+    )
+
+    # Partial days at the edges of the range are grouped exactly
+    if first_day < end_day:
+        edges = [(start_date, first_day - pd.Timedelta(microseconds=1)), (end_day, end_date)]
+    else:
+        edges = [(start_date, end_date)]
+    edge_rows = [
+        _exact_rows(df, lo, hi, category, region).assign(**{threshold_column: 0.0})
+        for lo, hi in edges if lo <= hi
+    ]
+    kept = pd.concat([kept] + edge_rows, ignore_index=True)
+
+    # Only partitions that dropped something (a positive threshold) can hide revenue
+    kept['open'] = kept[threshold_column] > 0
+    bounds = kept.groupby('product_name').agg(
+        category=('category', 'first'),
+        sales=('sales', 'sum'),
+        quantity=('quantity', 'sum'),
+        order_id=('order_id', 'sum'),
+        seen_threshold=(threshold_column, 'sum'),
+        seen_open=('open', 'sum')
+    )
+
+    # Every product belongs to one category, so it can only have been dropped
+    # by the open partitions of that category. Its total is exact when it was
+    # kept in all of them; otherwise it can exceed what was kept by the
+    # thresholds of those that dropped it. Counting partitions avoids
+    # comparing float sums added in different orders.
+    open_partitions = selected[selected[threshold_column] > 0].groupby(
+        'category', observed=True
+    )[threshold_column].agg(['size', 'sum'])
+    num_open = bounds['category'].map(open_partitions['size']).fillna(0)
+    total_threshold = bounds['category'].map(open_partitions['sum']).fillna(0)
+    bounds['exact'] = bounds['seen_open'] == num_open
+    bounds['upper'] = bounds[by].where(
+        bounds['exact'], bounds[by] + total_threshold - bounds['seen_threshold']
+    )
+    bounds = bounds.sort_values(by, ascending=False, kind='stable')
+
+    # The ranking is settled when each of the top products is certain to beat
+    # every product listed below it, and any product dropped everywhere (which
+    # can have at most its category's total threshold). Ties are only safe
+    # between exact totals, which a full groupby orders the same way.
+    lower = bounds[by].to_numpy()
+    exact = bounds['exact'].to_numpy()
+    unseen_upper = open_partitions['sum'].max() if len(open_partitions) else 0.0
+    inexact_below = _max_below(np.where(exact, -np.inf, bounds['upper'].to_numpy()), unseen_upper)
+    exact_below = _max_below(np.where(exact, lower, -np.inf), -np.inf)
+
+    n = min(k, len(bounds))
+    settled = (lower > inexact_below) & ((lower > exact_below) | (exact & (lower >= exact_below)))
+    ranking_exact = bool(settled[:n].all() and (n == k or unseen_upper == 0))
+    totals_exact = bool(exact[:n].all())
+
+    top_products = bounds.head(k)[['quantity', 'sales', 'order_id']].reset_index()
+    return top_products, ranking_exact, totals_exact
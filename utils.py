@@ -1,5 +1,8 @@
-import pandas as pd
 import datetime
+from instrumentation import lazy_import
+
+# Columns used to stratify the approximate-query sample
+STRATA_COLUMNS = ['category', 'region']
 
 def format_currency(value):
     """
@@ -13,6 +16,22 @@ def format_currency(value):
     """
     return f"${value:,.2f}"
 
+def normalize_selection(selection, all_labels):
+    """
+    Turn a filter selection into the list of values to keep.
+    
+    Args:
+        selection: A single value, an "All ..." label, or a list of values
+            (an empty list selects everything)
+        all_labels: Labels meaning no filter, e.g. ["All Categories"]
+        
+    Returns:
+        list: Values to keep, or None when nothing should be filtered out
+    """
+    if isinstance(selection, str):
+        return None if selection in all_labels else [selection]
+    return list(selection) or None
+
 def apply_filters(df, start_date, end_date, category, region):
     """
     Apply Amazon seller data filters to the DataFrame based on user selections.
@@ -21,8 +40,8 @@ def apply_filters(df, start_date, end_date, category, region):
         df: The original DataFrame containing Amazon seller data
         start_date: Start date for filtering sales data
         end_date: End date for filtering sales data
-        category: Selected Amazon product category
-        region: Selected Amazon marketplace
+        category: Selected Amazon product category, or a list of categories
+        region: Selected Amazon marketplace, or a list of marketplaces
         
     Returns:
         DataFrame: Filtered DataFrame with Amazon seller data
@@ -35,11 +54,147 @@ def apply_filters(df, start_date, end_date, category, region):
                              (filtered_df['date'] <= end_date)]
     
     # Apply category filter if not "All Categories"
-    if category != "All Categories":
-        filtered_df = filtered_df[filtered_df['category'] == category]
+    categories = normalize_selection(category, ["All Categories"])
+    if categories is not None:
+        filtered_df = filtered_df[filtered_df['category'].isin(categories)]
     
     # Apply marketplace filter if not "All Marketplaces"
-    if region != "All Marketplaces" and region != "All Regions":
-        filtered_df = filtered_df[filtered_df['region'] == region]
+    regions = normalize_selection(region, ["All Marketplaces", "All Regions"])
+    if regions is not None:
+        filtered_df = filtered_df[filtered_df['region'].isin(regions)]
     
     return filtered_df
+
+def build_stratified_sample(df, sample_size=5000, min_per_stratum=30, seed=42):
+    """
+    Draw a stratified random sample of Amazon orders for approximate queries.
+    
+    Each category/marketplace stratum gets a share of the sample proportional
+    to its order count, with at least min_per_stratum orders (or the whole
+    stratum when it is smaller). Sampled rows keep their stratum population
+    and sample sizes so estimates stay unbiased after date or other filters.
+    
+    Args:
+        df: The original DataFrame containing Amazon seller data
+        sample_size: Target number of sampled orders
+        min_per_stratum: Minimum number of orders kept per stratum
+        seed: Random seed for reproducible samples
+        
+    Returns:
+        DataFrame: Sampled orders with _stratum, _stratum_size, _stratum_sample
+        and _weight columns
+    """
+    np = lazy_import('numpy')
+    
+    if df.empty:
+        return df.assign(_stratum=0, _stratum_size=0, _stratum_sample=0, _weight=1.0)
+    
+    # Shuffle once so the first n rows of each stratum are a random sample
+    rng = np.random.default_rng(seed)
+    shuffled = df.iloc[rng.permutation(len(df))]
+    grouped = shuffled.groupby(STRATA_COLUMNS, observed=True, sort=False)
+    
+    stratum = grouped.ngroup().to_numpy()
+    stratum_size = grouped['order_id'].transform('size').to_numpy()
+    rank = grouped.cumcount().to_numpy()
+    
+    # Proportional allocation with a floor, capped at the stratum size
+    allocation = np.maximum(np.round(sample_size * stratum_size / len(df)), min_per_stratum)
+    allocation = np.minimum(allocation, stratum_size).astype(int)
+    
+    keep = rank < allocation
+    sample = shuffled[keep].copy()
+    sample['_stratum'] = stratum[keep]
+    sample['_stratum_size'] = stratum_size[keep]
+    sample['_stratum_sample'] = allocation[keep]
+    sample['_weight'] = sample['_stratum_size'] / sample['_stratum_sample']
+    
+    return sample.sort_values('date')
+
+def _stratified_total(sample_df, values):
+    """
+    Estimate a population total and its variance from a stratified sample.
+    
+    Rows removed by filters count as zeros in their stratum, which is what
+    makes the estimate valid for any filtered subset of the sample. Strata
+    are numbered from 0, so per-stratum sums are bincounts rather than
+    groupbys, which keeps estimates fast enough for the first paint.
+    
+    Args:
+        sample_df: A (possibly filtered) sample from build_stratified_sample
+        values: Per-row values to total, aligned with sample_df
+        
+    Returns:
+        tuple: (estimated total, variance of the estimate)
+    """
+    np = lazy_import('numpy')
+    
+    stratum = sample_df['_stratum'].to_numpy()
+    values = np.asarray(values, dtype=float)
+    num_strata = stratum.max() + 1 if len(stratum) else 0
+    
+    # Only strata with rows left after filtering contribute
+    present = np.bincount(stratum, minlength=num_strata) > 0
+    y = np.bincount(stratum, weights=values, minlength=num_strata)[present]
+    y2 = np.bincount(stratum, weights=values ** 2, minlength=num_strata)[present]
+    population = np.zeros(num_strata)
+    population[stratum] = sample_df['_stratum_size'].to_numpy()
+    n = np.ones(num_strata)
+    n[stratum] = sample_df['_stratum_sample'].to_numpy()
+    population, n = population[present], n[present]
+    
+    mean = y / n
+    stratum_var = np.clip((y2 - n * mean ** 2) / np.maximum(n - 1, 1), 0, None)
+    
+    total = (population * mean).sum()
+    variance = (population ** 2 * (1 - n / population) * stratum_var / n).sum()
+    return float(total), float(variance)
+
+def estimate_kpis(sample_df, z=1.96):
+    """
+    Estimate dashboard KPIs with confidence intervals from a stratified sample.
+    
+    Each sampled row is treated as one order. Average order value uses a
+    ratio estimator with a linearized variance.
+    
+    Args:
+        sample_df: A (possibly filtered) sample from build_stratified_sample
+        z: Normal quantile for the interval (1.96 gives 95% confidence)
+        
+    Returns:
+        dict: Metric name mapped to (estimate, margin of error)
+    """
+    np = lazy_import('numpy')
+    
+    revenue, revenue_var = _stratified_total(sample_df, sample_df['sales'])
+    orders, orders_var = _stratified_total(sample_df, np.ones(len(sample_df)))
+    units, units_var = _stratified_total(sample_df, sample_df['quantity'])
+    
+    avg_order_value = revenue / orders if orders > 0 else 0
+    _, residual_var = _stratified_total(sample_df, sample_df['sales'] - avg_order_value)
+    avg_order_value_var = residual_var / orders ** 2 if orders > 0 else 0
+    
+    return {
+        'total_sales': (revenue, z * np.sqrt(revenue_var)),
+        'total_orders': (orders, z * np.sqrt(orders_var)),
+        'avg_order_value': (avg_order_value, z * np.sqrt(avg_order_value_var)),
+        'total_units_sold': (units, z * np.sqrt(units_var))
+    }
+
+def weight_sample(sample_df):
+    """
+    Scale sampled sales and units by their weights for chart building.
+    
+    Sums over the returned DataFrame estimate sums over the full data, so the
+    existing chart functions can be reused on an approximate view.
+    
+    Args:
+        sample_df: A (possibly filtered) sample from build_stratified_sample
+        
+    Returns:
+        DataFrame: Copy of the sample with weighted sales and quantity
+    """
+    weighted_df = sample_df.copy()
+    weighted_df['sales'] = weighted_df['sales'] * weighted_df['_weight']
+    weighted_df['quantity'] = weighted_df['quantity'] * weighted_df['_weight']
+    return weighted_df